@@ -1,8 +1,19 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import plotly.graph_objects as go
 import numpy as np
-from datetime import datetime, timedelta
-import json # GeoJSONファイルを読み込むために追加
+import pandas as pd
+from datetime import datetime, timedelta, timezone
+import orjson # 大きなGeoJSONを高速にパースするため標準のjsonから変更
+import ijson # APIレスポンスを全体をメモリに載せずにストリーミングパースするため追加
+import os
+import pickle
+import gzip
+import hashlib
+import shutil
+import time
 
 # --- 設定 ---
 # データを取得する期間（現在から遡る日数）。例: 30日前のデータまで取得。
@@ -36,6 +47,33 @@ CITY_MARKER_SIZE = 3
 
 # GeoJSONファイル名
 GEOJSON_FILE = 'gadm41_JPN_0.json' # 追加
+# 海岸線のNumPy配列キャッシュファイル名。GeoJSONのパース結果を保存して次回以降の起動を高速化。
+COASTLINE_CACHE_FILE = 'coastline.cache'
+# 海岸線の間引き許容誤差（度単位）。デフォルトのカメラズームで見えない頂点を削減する。
+# 0にすると間引きを行わない。
+COASTLINE_SIMPLIFY_TOLERANCE = 0.01
+
+# USGS APIへの問い合わせを分割する時間ウィンドウの日数。
+# 1リクエストのlimit(20000件)超過による取りこぼしを防ぎ、並列取得を可能にする。
+QUERY_WINDOW_DAYS = 30
+# 並列リクエストの最大数（コネクションプールのサイズと揃える）。
+MAX_PARALLEL_REQUESTS = 8
+# HTTPリクエストのタイムアウト（接続, 読み取り）秒数。
+REQUEST_TIMEOUT = (5, 30)
+# USGSレスポンスのディスクキャッシュの保存先ディレクトリ。
+USGS_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'earthquake')
+# キャッシュの有効期間（秒）。過去データはほぼ不変なので、この間はHTTPリクエストを省略する。
+USGS_CACHE_TTL_SECONDS = 3600
+
+# keep-aliveでTLSハンドシェイクを使い回すためのモジュール共有Session。
+# 一時的な5xx/429にはバックオフ付きで最大3回リトライする。
+_session = requests.Session()
+_session.mount('https://', HTTPAdapter(
+    pool_connections=MAX_PARALLEL_REQUESTS,
+    pool_maxsize=MAX_PARALLEL_REQUESTS,
+    max_retries=Retry(total=3, backoff_factor=0.5,
+                      status_forcelist=[429, 500, 502, 503, 504])
+))
 
 # 主要な日本の都市のデータ: (緯度, 経度, 都市名) のタプルのリスト。
 MAJOR_JAPANESE_CITIES = [
@@ -55,6 +93,11 @@ MAJOR_JAPANESE_CITIES = [
     (31.5969, 130.5571, "鹿児島"),
     (26.2124, 127.6809, "那覇")
 ]
+# 都市データをインポート時に一度だけ列ごとの配列に展開しておく（可視化のたびの内包表記を省略）。
+_CITY_LATS = np.array([city[0] for city in MAJOR_JAPANESE_CITIES])
+_CITY_LONS = np.array([city[1] for city in MAJOR_JAPANESE_CITIES])
+_CITY_NAMES = [city[2] for city in MAJOR_JAPANESE_CITIES]
+_CITY_ZS = np.zeros(len(MAJOR_JAPANESE_CITIES))
 # -----------
 
 def get_usgs_earthquake_data(days_ago, min_magnitude, min_lat, max_lat, min_lon, max_lon):
@@ -70,68 +113,139 @@ def get_usgs_earthquake_data(days_ago, min_magnitude, min_lat, max_lat, min_lon,
         max_lon (float): 取得範囲の最大経度。
 
     Returns:
-        list: 取得した地震情報のリスト。各要素は辞書形式。
+        dict: 列指向（structure-of-arrays）の地震情報。
+            'latitude'/'longitude'/'depth'/'magnitude'はnp.ndarray、
+            'time'/'place'は文字列のリスト。取得失敗時は空の辞書。
     """
-    # APIリクエストの終了時刻（現在時刻）。
-    end_time = datetime.now()
+    # APIリクエストの終了時刻。USGS APIはUTCを期待するため、ローカル時刻ではなくUTCを使う。
+    # キャッシュキーがTTL内で安定するよう正時に切り下げる。
+    end_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
     # APIリクエストの開始時刻（現在時刻からdays_ago分遡る）。
     start_time = end_time - timedelta(days=days_ago)
     # USGS地震カタログAPIのエンドポイントURL。
     api_url = "https://earthquake.usgs.gov/fdsnws/event/1/query"
-    # APIに渡すパラメータを格納した辞書。
-    params = {
+    # 全ウィンドウで共通のパラメータを格納した辞書。
+    base_params = {
         "format": "geojson", # データ形式をGeoJSONに指定。
-        "starttime": start_time.strftime("%Y-%m-%dT%H:%M:%S"), # 検索開始日時。
-        "endtime": end_time.strftime("%Y-%m-%dT%H:%M:%S"),     # 検索終了日時。
         "minmagnitude": min_magnitude, # 最小マグニチュード。
         "minlatitude": min_lat,        # 最小緯度。
         "maxlatitude": max_lat,        # 最大緯度。
         "minlongitude": min_lon,       # 最小経度。
         "maxlongitude": max_lon,       # 最大経度。
+        "mindepth": MIN_DEPTH_KM,      # 最小深度（km）。浅い地震はサーバー側で除外。
         "limit": 20000,                # 1リクエストあたりの最大取得件数。
         "orderby": "time",             # 結果を時間でソート。
     }
-    
-    print(f"USGS APIから過去{days_ago}日間のM{min_magnitude}以上の地震情報を取得中...")
+
+    # 期間をQUERY_WINDOW_DAYS日ごとのウィンドウに分割する。
+    # 1回のリクエストでlimitに達して取りこぼすことを防ぎ、並列取得でRTTを隠蔽する。
+    # 境界の日時文字列はここで一度だけ整形し、隣接ウィンドウで使い回す。
+    windows = []
+    window_start = start_time
+    start_str = window_start.strftime("%Y-%m-%dT%H:%M:%S")
+    while window_start < end_time:
+        window_end = min(window_start + timedelta(days=QUERY_WINDOW_DAYS), end_time)
+        end_str = window_end.strftime("%Y-%m-%dT%H:%M:%S")
+        windows.append((start_str, end_str))
+        window_start = window_end
+        start_str = end_str
+
+    def fetch_window(window):
+        """
+        1つの時間ウィンドウ分の地震イベントを取得し、
+        (緯度, 経度, 深さ, マグニチュード, 発生時刻ms, 場所)のタプルのリストとして返す。
+        """
+        start_str, end_str = window
+        params = dict(base_params, starttime=start_str, endtime=end_str)
+        # クエリパラメータから決まるキャッシュファイル。TTL内ならHTTPリクエストを丸ごと省略する。
+        cache_key = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()
+        cache_path = os.path.join(USGS_CACHE_DIR, f"{cache_key}.json.gz")
+        cache_valid = (os.path.exists(cache_path)
+                       and time.time() - os.path.getmtime(cache_path) < USGS_CACHE_TTL_SECONDS)
+
+        if not cache_valid:
+            response = _session.get(api_url, params=params, timeout=REQUEST_TIMEOUT, stream=True)
+            # HTTPエラーが発生した場合に例外を発生させる。
+            response.raise_for_status()
+            # gzip転送をurllib3側で展開してから保存する。
+            response.raw.decode_content = True
+            os.makedirs(USGS_CACHE_DIR, exist_ok=True)
+            # 途中で失敗しても壊れたキャッシュが残らないよう、一時ファイルに書いてから置き換える。
+            temp_path = cache_path + '.tmp'
+            with gzip.open(temp_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f)
+            os.replace(temp_path, cache_path)
+
+        rows = []
+        # レスポンス全体を辞書として構築せず、featureごとにストリーミングパースする。
+        with gzip.open(cache_path, 'rb') as cached_body:
+            for feature in ijson.items(cached_body, 'features.item'):
+                # イベントのプロパティ（マグニチュード、場所、時刻など）。
+                properties = feature.get('properties')
+                # イベントの地理情報（経度、緯度、深さ）。
+                geometry = feature.get('geometry')
+                # プロパティと地理情報が存在し、座標データがあることを確認。
+                # 欠損値の検査はここでは行わず、後段でNumPyのマスクとして一括処理する。
+                if properties and geometry and geometry.get('coordinates'):
+                    coordinates = geometry['coordinates']
+                    rows.append((coordinates[1],           # 緯度。
+                                 coordinates[0],           # 経度。
+                                 coordinates[2],           # 深さ（km）。
+                                 properties.get('mag'),    # マグニチュード。
+                                 properties.get('time'),   # Unixミリ秒形式の発生時刻。
+                                 properties.get('place'))) # 地震の発生場所のテキスト。
+        return rows
+
+    print(f"USGS APIから過去{days_ago}日間のM{min_magnitude}以上の地震情報を取得中... ({len(windows)}ウィンドウに分割)")
     try:
-        # APIリクエストを実行。
-        response = requests.get(api_url, params=params)
-        # HTTPエラーが発生した場合に例外を発生させる。
-        response.raise_for_status()
-        # レスポンスボディをJSON形式でパース。
-        data = response.json()
-        # 処理済みの地震情報を格納するリスト。
-        earthquake_list = []
-        # GeoJSONデータ内の各地震イベントをループ処理。
-        for feature in data.get('features', []):
-            # イベントのプロパティ（マグニチュード、場所、時刻など）。
-            properties = feature.get('properties')
-            # イベントの地理情報（経度、緯度、深さ）。
-            geometry = feature.get('geometry')
-            # プロパティと地理情報が存在し、座標データがあることを確認。
-            if properties and geometry and geometry.get('coordinates'):
-                lon = geometry['coordinates'][0] # 経度。
-                lat = geometry['coordinates'][1] # 緯度。
-                depth = geometry['coordinates'][2] # 深さ（km）。
-                mag = properties.get('mag')      # マグニチュード。
-                time_ms = properties.get('time') # Unixミリ秒形式の発生時刻。
-                place = properties.get('place')  # 地震の発生場所のテキスト。
-
-                # Unixミリ秒を日時文字列に変換。
-                event_time = datetime.fromtimestamp(time_ms / 1000).strftime("%Y/%m/%d %H:%M:%S") if time_ms else "不明"
-                # 緯度、経度、深さが有効な数値であり、深さとマグニチュードが存在することを確認。
-                if all(isinstance(val, (int, float)) for val in [lat, lon, depth]) and depth is not None and mag is not None:
-                    # 指定された最小深度以上の地震のみをリストに追加。
-                    if depth >= MIN_DEPTH_KM:
-                        earthquake_list.append({
-                            'latitude': lat, 'longitude': lon, 'depth': depth,
-                            'magnitude': mag, 'time': event_time, 'place': place
-                        })
-        return earthquake_list
+        # 各ウィンドウを並列に取得し、時系列順に結合する。
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_REQUESTS) as executor:
+            rows = [row for window_rows in executor.map(fetch_window, windows)
+                    for row in window_rows]
+        # 行のリストを列指向の並列リストに転置する。
+        if rows:
+            lats, lons, depths, mags, times_ms, places = (list(col) for col in zip(*rows))
+        else:
+            lats, lons, depths, mags, times_ms, places = [], [], [], [], [], []
+
+        # 数値列をNumPy配列化（Noneはnanになる）。
+        lat_array = np.array(lats, dtype=np.float64)
+        lon_array = np.array(lons, dtype=np.float64)
+        depth_array = np.array(depths, dtype=np.float64)
+        mag_array = np.array(mags, dtype=np.float64)
+        # 欠損値の除外はイベントごとのisinstance検査ではなく、1回のベクトル演算で行う。
+        valid = (np.isfinite(lat_array) & np.isfinite(lon_array)
+                 & np.isfinite(depth_array) & np.isfinite(mag_array))
+
+        # Unixミリ秒を日時文字列に一括変換（イベントごとのstrftime呼び出しを回避）。
+        event_times = pd.to_datetime(times_ms, unit='ms', errors='coerce') \
+            .strftime("%Y/%m/%d %H:%M:%S").fillna("不明").tolist()
+
+        # 列指向（structure-of-arrays）で返す。
+        # 下流が辞書のリストを再走査して同じキーを引き直す必要がなくなり、
+        # 数値列はそのままNumPy演算・Plotlyに渡せる。
+        return {
+            'latitude': lat_array[valid],
+            'longitude': lon_array[valid],
+            'depth': depth_array[valid],
+            'magnitude': mag_array[valid],
+            'time': [t for t, ok in zip(event_times, valid) if ok],
+            'place': [p for p, ok in zip(places, valid) if ok],
+        }
     except requests.exceptions.RequestException as e:
         # APIリクエスト中にエラーが発生した場合、エラーメッセージを表示。
         print(f"APIからのデータ取得中にエラーが発生しました: {e}")
-        return []
+        return {}
+
+# ジオメトリタイプごとの線分抽出ハンドラ。
+# ジオメトリごとのif/elif連鎖の代わりに辞書引き1回でディスパッチする。
+# ポリゴンは外側のリングのみを線として取得。Pointなど未対応タイプは空リスト。
+_GEOMETRY_LINE_HANDLERS = {
+    'LineString': lambda coords: [coords],
+    'MultiLineString': list,
+    'Polygon': lambda coords: [coords[0]],
+    'MultiPolygon': lambda coords: [poly[0] for poly in coords],
+}
 
 def extract_geojson_lines(geojson_data):
     """
@@ -141,25 +255,8 @@ def extract_geojson_lines(geojson_data):
     all_lines = []
 
     def extract_coords(geometry):
-        coords = []
-        geom_type = geometry.get('type')
-        geom_coords = geometry.get('coordinates')
-
-        if geom_type == 'Point':
-            # ポイントは線ではないのでスキップ
-            pass
-        elif geom_type == 'LineString':
-            coords.append(geom_coords)
-        elif geom_type == 'MultiLineString':
-            coords.extend(geom_coords)
-        elif geom_type == 'Polygon':
-            # ポリゴンの外側のリングのみを線として取得
-            coords.append(geom_coords[0])
-        elif geom_type == 'MultiPolygon':
-            # 複数のポリゴンそれぞれについて外側のリングを取得
-            for poly in geom_coords:
-                coords.append(poly[0])
-        return coords
+        handler = _GEOMETRY_LINE_HANDLERS.get(geometry.get('type'))
+        return handler(geometry.get('coordinates')) if handler else []
 
     # GeoJSON FeatureCollectionの場合
     if geojson_data.get('type') == 'FeatureCollection':
@@ -178,38 +275,123 @@ def extract_geojson_lines(geojson_data):
     
     return all_lines
 
+def simplify_ring(points, tolerance):
+    """
+    Ramer-Douglas-Peucker法で線分の頂点を間引くヘルパー関数。
+
+    線分を端点同士を結ぶ直線で近似し、直線からの距離がtolerance以下の
+    中間頂点を取り除く。垂線距離の計算はNumPyで一括処理する。
+
+    Args:
+        points (np.ndarray): (N,2)の座標配列。
+        tolerance (float): 許容誤差（座標と同じ単位）。
+
+    Returns:
+        np.ndarray: 間引き後の(M,2)の座標配列（M <= N）。
+    """
+    if tolerance <= 0 or len(points) < 3:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    # 再帰の代わりにスタックで区間を処理する。
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        segment_length = np.hypot(segment[0], segment[1])
+        if segment_length == 0:
+            # 端点が一致する場合は端点からの距離で代用。
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            # 端点を結ぶ直線への垂線距離（外積の絶対値 / 線分長）。
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / segment_length
+        farthest = np.argmax(distances)
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return points[keep]
+
+def load_coastline_lines():
+    """
+    GeoJSONファイルから海岸線の座標配列リストを読み込むヘルパー関数。
+
+    初回はJSONをパースして各リングを(N,2)のfloat32 ndarrayに変換・間引きし、
+    GeoJSONファイルのmtime・間引き許容誤差と一緒にpickleでキャッシュする。
+    2回目以降は両方が一致すればキャッシュを読むだけで済み、JSONパースと間引きを丸ごと省略できる。
+
+    Returns:
+        list: 各要素が(N,2)のnp.ndarray（列0=経度、列1=緯度）のリスト。
+    """
+    geojson_mtime = os.path.getmtime(GEOJSON_FILE)
+
+    # キャッシュが存在し、GeoJSONファイルも間引き設定も変わっていなければそれを使う。
+    if os.path.exists(COASTLINE_CACHE_FILE):
+        try:
+            with open(COASTLINE_CACHE_FILE, 'rb') as f:
+                cached_mtime, cached_tolerance, line_arrays = pickle.load(f)
+            if cached_mtime == geojson_mtime and cached_tolerance == COASTLINE_SIMPLIFY_TOLERANCE:
+                print(f"海岸線キャッシュ '{COASTLINE_CACHE_FILE}' から {len(line_arrays)} 個の線分を読み込みました。")
+                return line_arrays
+        except (pickle.UnpicklingError, EOFError, ValueError):
+            # キャッシュが壊れているか旧形式の場合はGeoJSONから再生成する。
+            pass
+
+    with open(GEOJSON_FILE, 'rb') as f:
+        geojson_data = orjson.loads(f.read())
+    # 各リングをNumPy配列に変換し、見えない頂点を間引いてからキャッシュに保存。
+    line_arrays = [
+        simplify_ring(np.asarray(ring, dtype=np.float32), COASTLINE_SIMPLIFY_TOLERANCE)
+        for ring in extract_geojson_lines(geojson_data)
+    ]
+    with open(COASTLINE_CACHE_FILE, 'wb') as f:
+        pickle.dump((geojson_mtime, COASTLINE_SIMPLIFY_TOLERANCE, line_arrays), f)
+    print(f"GeoJSONファイル '{GEOJSON_FILE}' から {len(line_arrays)} 個の線分を抽出し、キャッシュしました。")
+    return line_arrays
+
 def visualize_earthquakes_pure_3d(earthquakes_data):
     """
     取得した地震データを3Dで可視化する関数。
 
     Args:
-        earthquakes_data (list): get_usgs_earthquake_data関数から返された地震情報のリスト。
+        earthquakes_data (dict): get_usgs_earthquake_data関数から返された列指向の地震情報。
     """
-    if not earthquakes_data:
+    if not earthquakes_data or len(earthquakes_data['latitude']) == 0:
         print("可視化する地震情報がありません。")
         return
 
-    print(f"可視化対象の有効な地震データ数: {len(earthquakes_data)}件")
-    latitudes, longitudes, depths_for_plot, depths_original, magnitudes, event_details = [], [], [], [], [], []
-
-    for eq in earthquakes_data:
-        latitudes.append(eq['latitude'])
-        longitudes.append(eq['longitude'])
-        depths_original.append(eq['depth'])
-        depths_for_plot.append(-eq['depth']) # 深さはZ軸で下向きに表現するため負の値にする。
-        magnitudes.append(eq['magnitude'])
-
-        detail_text = (
-            f"発生時刻: {eq['time']}<br>"
-            f"震源: {eq['place']}<br>"
-            f"緯度: {eq['latitude']}<br>"
-            f"経度: {eq['longitude']}<br>"
-            f"深さ: {eq['depth']} km<br>"
-            f"マグニチュード: {eq['magnitude']}"
-        )
-        event_details.append(detail_text)
+    # 列指向データなので、数値列はそのままNumPy配列として使える。
+    latitudes = earthquakes_data['latitude']
+    longitudes = earthquakes_data['longitude']
+    depths_original = earthquakes_data['depth']
+    magnitudes = earthquakes_data['magnitude']
+    print(f"可視化対象の有効な地震データ数: {len(latitudes)}件")
+    # 深さはZ軸で下向きに表現するため負の値にする。
+    depths_for_plot = -depths_original
+    # マーカーサイズもベクトル演算で一括計算（表示用なのでfloat32で十分）。
+    marker_sizes = np.maximum(EARTHQUAKE_MARKER_SIZE_BASE,
+                              magnitudes.astype(np.float32) * MARKER_MAGNITUDE_MULTIPLIER)
 
-    marker_sizes = [max(EARTHQUAKE_MARKER_SIZE_BASE, (mag * MARKER_MAGNITUDE_MULTIPLIER)) for mag in magnitudes]
+    # ホバー表示用の生データを2次元配列にまとめる。
+    # イベントごとのHTML文字列を事前生成する代わりに、hovertemplateでブラウザ側に整形させる。
+    customdata = np.column_stack([
+        earthquakes_data['time'],
+        earthquakes_data['place'],
+        latitudes, longitudes, depths_original, magnitudes
+    ])
+    hover_template = (
+        '発生時刻: %{customdata[0]}<br>'
+        '震源: %{customdata[1]}<br>'
+        '緯度: %{customdata[2]}<br>'
+        '経度: %{customdata[3]}<br>'
+        '深さ: %{customdata[4]} km<br>'
+        'マグニチュード: %{customdata[5]}<extra></extra>'
+    )
 
     data_to_plot = [
         go.Scatter3d(
@@ -225,31 +407,22 @@ def visualize_earthquakes_pure_3d(earthquakes_data):
                 line_color='rgba(0,0,0,0.3)',
                 line_width=0.5
             ),
-            text=event_details, hoverinfo='text',
+            customdata=customdata, hovertemplate=hover_template,
             name='Earthquakes'
         )
     ]
 
     # 主要都市をプロット（Z=0に固定）
-    city_lats = [city[0] for city in MAJOR_JAPANESE_CITIES]
-    city_lons = [city[1] for city in MAJOR_JAPANESE_CITIES]
-    city_names = [city[2] for city in MAJOR_JAPANESE_CITIES]
-    city_zs = [0] * len(MAJOR_JAPANESE_CITIES)
-
     data_to_plot.append(
         go.Scatter3d(
-            x=city_lons, y=city_lats, z=city_zs,
+            x=_CITY_LONS, y=_CITY_LATS, z=_CITY_ZS,
             mode='markers+text',
+            # symbolやtextfontはデフォルト値のままなので指定せず、シリアライズ量を抑える。
             marker=dict(
                 size=CITY_MARKER_SIZE,
                 color='black',
-                symbol='circle',
-            ),
-            text=city_names,
-            textfont=dict(
-                color='black',
-                size=10
             ),
+            text=_CITY_NAMES,
             textposition='top center',
             hoverinfo='text',
             name='Major Cities'
@@ -258,34 +431,32 @@ def visualize_earthquakes_pure_3d(earthquakes_data):
 
     # --- GeoJSONファイルの読み込みとプロット ---
     try:
-        with open(GEOJSON_FILE, 'r', encoding='utf-8') as f:
-            geojson_data = json.load(f)
-        
-        # GeoJSONデータから線分を抽出
-        map_lines = extract_geojson_lines(geojson_data)
-        print(f"GeoJSONファイル '{GEOJSON_FILE}' から {len(map_lines)} 個の線分を抽出しました。")
-
-        # 各線分をPlotlyのトレースとして追加
-        for i, line_coords in enumerate(map_lines):
-            # 経度と緯度を分離
-            line_lons = [coord[0] for coord in line_coords]
-            line_lats = [coord[1] for coord in line_coords]
-            # Z座標は地表(0)に固定
-            line_zs = [0] * len(line_coords)
-
-            data_to_plot.append(go.Scatter3d(
-                x=line_lons, y=line_lats, z=line_zs,
-                mode='lines',
-                line=dict(color='gray', width=1), # 地図の線の色と太さを調整
-                showlegend=False, # 凡例に表示しない
-                hoverinfo='none', # マウスオーバー情報を表示しない
-                name=f'GeoJSON_Map_Line_{i}' # トレース名 (内部用)
-            ))
+        # 海岸線の座標配列を読み込む（キャッシュがあればJSONパースは省略される）。
+        map_lines = load_coastline_lines()
+
+        # 全リングをNaN区切りで1本の配列に連結し、単一トレースとして追加する。
+        # PlotlyはNaNで線を途切れさせるため見た目は変わらず、
+        # リング数分のトレースのオーバーヘッドとHTMLサイズを削減できる。
+        nan_separator = np.array([[np.nan, np.nan]], dtype=np.float32)
+        coastline = np.concatenate(
+            [part for ring in map_lines for part in (ring, nan_separator)]
+        )
+        # Z座標は地表(0)に固定
+        line_zs = np.zeros(len(coastline))
+
+        data_to_plot.append(go.Scatter3d(
+            x=coastline[:, 0], y=coastline[:, 1], z=line_zs,
+            mode='lines',
+            line=dict(color='gray', width=1), # 地図の線の色と太さを調整
+            showlegend=False, # 凡例に表示しない
+            hoverinfo='none', # マウスオーバー情報を表示しない
+            name='GeoJSON_Map_Lines' # トレース名 (内部用)
+        ))
         print("GeoJSONの線分をプロットに追加しました。")
 
     except FileNotFoundError:
         print(f"エラー: GeoJSONファイル '{GEOJSON_FILE}' が見つかりません。")
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"エラー: GeoJSONファイル '{GEOJSON_FILE}' の形式が不正です。")
     except Exception as e:
         print(f"GeoJSONの読み込みまたは処理中にエラーが発生しました: {e}")
@@ -308,9 +479,34 @@ def visualize_earthquakes_pure_3d(earthquakes_data):
     )
     fig.show()
 
-    output_filename = "earthquake_map.html"
-    fig.write_html(output_filename, include_plotlyjs='cdn')
-    print(f"グラフが '{output_filename}' として保存されました。")
+    # 図のデータはgzip圧縮したJSONとして別ファイルに保存し、
+    # HTML側は取得・展開・描画を行う小さなブートストラップだけにする。
+    # 図データをHTMLにインライン展開するよりディスクサイズと転送量を大幅に削減できる。
+    output_html = "earthquake_map.html"
+    output_json_gz = "earthquake_map.json.gz"
+    with open(output_json_gz, 'wb') as f:
+        f.write(gzip.compress(fig.to_json().encode('utf-8')))
+
+    bootstrap_html = f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<script src="https://cdn.plot.ly/plotly-2.35.2.min.js" charset="utf-8"></script>
+</head>
+<body>
+<div id="plot"></div>
+<script>
+fetch('{output_json_gz}')
+  .then(r => new Response(r.body.pipeThrough(new DecompressionStream('gzip'))).json())
+  .then(fig => Plotly.newPlot('plot', fig.data, fig.layout));
+</script>
+</body>
+</html>
+"""
+    with open(output_html, 'w', encoding='utf-8') as f:
+        f.write(bootstrap_html)
+    print(f"グラフが '{output_html}' (データ: '{output_json_gz}') として保存されました。")
+    print("注意: ブラウザのfetch制限のため、file://ではなくHTTPサーバー経由で開いてください。")
 
 if __name__ == "__main__":
     usgs_earthquake_data = get_usgs_earthquake_data(
@@ -318,7 +514,7 @@ if __name__ == "__main__":
         min_lat=MIN_LAT, max_lat=MAX_LAT, min_lon=MIN_LON, max_lon=MAX_LON
     )
     if usgs_earthquake_data:
-        print(f"USGS APIから{len(usgs_earthquake_data)}件の有効な地震データを受信しました。3D可視化を開始します。")
+        print(f"USGS APIから{len(usgs_earthquake_data['latitude'])}件の有効な地震データを受信しました。3D可視化を開始します。")
         visualize_earthquakes_pure_3d(usgs_earthquake_data)
     else:
         print("地震情報の取得に失敗したか、利用可能な情報がありませんでした。")
\ No newline at end of file